@@ -1,28 +1,64 @@
 import typer
 from typing_extensions import Annotated
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-import asyncio
+import enum
+import functools
 import sys
 import re
 
-from imagai import __version__
-from imagai.core import generate_image_core
-from imagai.models import ImageGenerationRequest
-from imagai.config import settings
-
 app = typer.Typer(
     name="imagai",
     help="🎨 A CLI tool to generate images using various AI APIs.",
     add_completion=False,
 )
-console = Console()
+
+_DEFAULT_KEY_PLACEHOLDER = "YOUR_OPENAI_API_KEY"
+
+
+# str-Enums are typer's supported mechanism for choice parameters; the CLI
+# receives the member and passes .value downstream.
+class ImageSize(str, enum.Enum):
+    SQUARE_256 = "256x256"
+    SQUARE_512 = "512x512"
+    SQUARE_1024 = "1024x1024"
+    LANDSCAPE = "1792x1024"
+    PORTRAIT = "1024x1792"
+
+
+class ImageQuality(str, enum.Enum):
+    STANDARD = "standard"
+    HD = "hd"
+
+
+class ImageStyle(str, enum.Enum):
+    VIVID = "vivid"
+    NATURAL = "natural"
+
+
+class ResponseFormat(str, enum.Enum):
+    URL = "url"
+    B64_JSON = "b64_json"
+
+
+@functools.cache
+def _console():
+    # rich pulls in pygments and builds its style table on import (~tens of
+    # ms), so commands fetch the shared Console lazily.
+    from rich.console import Console
+
+    return Console()
 
 
 def version_callback(value: bool):
     if value:
-        console.print(f"Imagai Version: [bold green]{__version__}[/bold green]")
+        # Read the version from package metadata so `--version` never pays the
+        # cost of importing the imagai package (and its heavy dependencies).
+        from importlib.metadata import version as _pkg_version
+
+        try:
+            _version = _pkg_version("imagai")
+        except Exception:
+            from imagai import __version__ as _version
+        print(f"Imagai Version: {_version}")
         raise typer.Exit()
 
 
@@ -67,23 +103,34 @@ def generate(
     ] = None,
     n: Annotated[
         int,
-        typer.Option("--num-images", "-n", min=1, help="Number of images to generate."),
+        typer.Option(
+            "--num-images", "-n", min=1, max=10, help="Number of images to generate."
+        ),
     ] = 1,
     size: Annotated[
-        str,
+        ImageSize,
         typer.Option(
             help="Image size (e.g., '1024x1024', '1792x1024'). Provider-dependent."
         ),
-    ] = "1024x1024",
+    ] = ImageSize.SQUARE_1024,
     quality: Annotated[
-        str, typer.Option(help="Image quality ('standard' or 'hd'). For DALL-E 3.")
-    ] = "standard",
+        ImageQuality,
+        typer.Option(help="Image quality ('standard' or 'hd'). For DALL-E 3."),
+    ] = ImageQuality.STANDARD,
     style: Annotated[
-        str, typer.Option(help="Image style ('vivid' or 'natural'). For DALL-E 3.")
-    ] = "vivid",
+        ImageStyle,
+        typer.Option(help="Image style ('vivid' or 'natural'). For DALL-E 3."),
+    ] = ImageStyle.VIVID,
     response_format: Annotated[
-        str, typer.Option(help="Response format ('url' or 'b64_json').")
-    ] = "b64_json",
+        ResponseFormat,
+        typer.Option(
+            help=(
+                "Response format ('url' or 'b64_json'). 'url' avoids the "
+                "~33% base64 wire overhead; use 'b64_json' for providers "
+                "that return ephemeral URLs."
+            )
+        ),
+    ] = ResponseFormat.URL,
     auto_filename: Annotated[
         bool,
         typer.Option(
@@ -149,6 +196,14 @@ def generate(
             help="[Vision via OpenRouter] Image URL to include for models like Gemini (chat.completions).",
         ),
     ] = None,
+    no_cache: Annotated[
+        bool,
+        typer.Option(
+            "--no-cache",
+            help="Bypass the local generation cache and always call the API.",
+            is_flag=True,
+        ),
+    ] = False,
     verbose: Annotated[
         bool,
         typer.Option(
@@ -158,6 +213,17 @@ def generate(
         ),
     ] = False,
 ):
+    # Heavy imports (openai, httpx, pydantic_settings, rich) are deferred here
+    # so `--help`, `--version` and shell completion stay fast.
+    import asyncio
+
+    from rich.panel import Panel
+
+    from imagai.config import settings
+    from imagai.core import generate_image_core
+    from imagai.models import ImageGenerationRequest
+
+    console = _console()
     selected_engine = engine or settings.default_engine
     if not selected_engine:
         console.print(
@@ -195,10 +261,10 @@ def generate(
         engine=selected_engine,
         output_filename=output,
         n=n,
-        size=size,
-        quality=quality,
-        style=style,
-        response_format=response_format,
+        size=size.value,
+        quality=quality.value,
+        style=style.value,
+        response_format=response_format.value,
         extra_params={
             k: v
             for k, v in {
@@ -215,13 +281,21 @@ def generate(
         verbose=verbose,
         auto_filename=auto_filename,
         random_filename=random_filename,
+        no_cache=no_cache,
     )
 
-    async def _generate():
-        return await generate_image_core(request)
+    # uvloop (libuv-backed event loop) noticeably cuts async dispatch overhead
+    # for the download/save fan-out; purely optional.
+    if sys.platform != "win32":
+        try:
+            import uvloop
+
+            uvloop.install()
+        except ImportError:
+            pass
 
     with console.status("[spinner]Processing...", spinner="dots"):
-        results = asyncio.run(_generate())
+        results = asyncio.run(generate_image_core(request))
     for i, result in enumerate(results):
         if result.error:
             console.print(
@@ -271,6 +345,12 @@ def list_engines_command(
         ),
     ] = False,
 ):
+    from rich.panel import Panel
+    from rich.table import Table
+
+    from imagai.config import settings
+
+    console = _console()
     if not settings.engines:
         console.print(
             "[yellow]No engines configured. Check your .env file or environment variables.[/yellow]"
@@ -281,18 +361,20 @@ def list_engines_command(
     table.add_column("API Key Set", style="magenta")
     table.add_column("Base URL", style="green")
     table.add_column("Default Model", style="yellow")
-    for name, config in settings.engines.items():
-        api_key_status = (
+    # Assemble all rows first, then feed the table in one pass.
+    rows = [
+        (
+            name,
             "✅ Set"
-            if config.api_key and config.api_key != "YOUR_OPENAI_API_KEY"
-            else "⚠️ Not Set / Default"
-        )
-        base_url_str = (
-            str(config.base_url) if config.base_url else "N/A (Official OpenAI)"
-        )
-        table.add_row(
-            name, api_key_status, base_url_str, config.model or "Not specified"
+            if config.api_key and config.api_key != _DEFAULT_KEY_PLACEHOLDER
+            else "⚠️ Not Set / Default",
+            str(config.base_url) if config.base_url else "N/A (Official OpenAI)",
+            config.model or "Not specified",
         )
+        for name, config in settings.engines.items()
+    ]
+    for row in rows:
+        table.add_row(*row)
     console.print(table)
 
     # If requested, also fetch models from each engine and display them
@@ -328,7 +410,7 @@ def list_engines_command(
     # Attempt to fetch models for each engine; prefer OpenAI client, fallback to direct HTTP GET {base_url}/models
     for name, config in settings.engines.items():
         # Skip if API key is not properly set
-        if not config.api_key or config.api_key == "YOUR_OPENAI_API_KEY":
+        if not config.api_key or config.api_key == _DEFAULT_KEY_PLACEHOLDER:
             console.print(
                 f"[yellow]Skipping model fetch for '{name}': missing API key.[/yellow]"
             )
@@ -1,18 +1,33 @@
-from pydantic import BaseModel, HttpUrl, Field
+from pydantic import BaseModel, HttpUrl, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Dict, Optional
+from pathlib import Path
+import functools
+import hashlib
 import os
+import pickle
+import tempfile
 
 
 class EngineConfig(BaseModel):
     api_key: str = Field(..., description="API key for the image generation engine.")
-    base_url: Optional[HttpUrl] = Field(
+    base_url: Optional[str] = Field(
         None, description="Base URL for the API (for OpenAI-compatible engines)."
     )
     model: Optional[str] = Field(
         None, description="Default model to use for this engine."
     )
 
+    @field_validator("base_url")
+    @classmethod
+    def _check_base_url(cls, value: Optional[str]) -> Optional[str]:
+        # Stored as a plain str (the SDK only ever sees str(base_url)); the
+        # URL check runs on explicit construction only — env overrides go
+        # through model_construct and are validated by the SDK at first use.
+        if value is not None:
+            HttpUrl(value)
+        return value
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -33,26 +48,79 @@ class Settings(BaseSettings):
     }
 
 
-settings = Settings()
+_CACHE_FILE = Path.home() / ".cache" / "imagai" / "settings.pkl"
+
+
+def _cache_key() -> str:
+    """Cheap fingerprint of everything that can influence Settings."""
+    try:
+        env_mtime = os.stat(".env").st_mtime_ns
+    except OSError:
+        env_mtime = 0
+    env_items = sorted(
+        (k, v) for k, v in os.environ.items() if k.startswith("IMAGAI__")
+    )
+    digest = hashlib.sha256(repr(env_items).encode()).hexdigest()
+    return f"{env_mtime}:{digest}"
+
 
-for key, value in os.environ.items():
-    if key.startswith("IMAGAI__ENGINES__"):
+def _build_settings() -> Settings:
+    settings = Settings()
+    # Single pass over the environment, grouped by engine, so each engine is
+    # rebuilt with one model_construct call (no per-var validator round-trip).
+    overrides: Dict[str, Dict[str, str]] = {}
+    for key, value in os.environ.items():
+        if key[:17] != "IMAGAI__ENGINES__":
+            continue
         parts = key.split("__")
         if len(parts) >= 4:
-            engine_name = parts[2].lower()
-            config_key = parts[3].lower()
-            if engine_name not in settings.engines:
-                settings.engines[engine_name] = EngineConfig(api_key="dummy")
-            if hasattr(settings.engines[engine_name], config_key):
-                if config_key == "base_url":
-                    try:
-                        value = HttpUrl(value)
-                    except Exception:
-                        pass
-                setattr(settings.engines[engine_name], config_key, value)
-            elif config_key == "api_key" and not settings.engines[engine_name].api_key:
-                settings.engines[engine_name].api_key = value
+            overrides.setdefault(parts[2].lower(), {})[parts[3].lower()] = value
+    for engine_name, fields in overrides.items():
+        existing = settings.engines.get(engine_name)
+        settings.engines[engine_name] = EngineConfig.model_construct(
+            api_key=fields.get(
+                "api_key", existing.api_key if existing else "dummy"
+            ),
+            base_url=fields.get(
+                "base_url", existing.base_url if existing else None
+            ),
+            model=fields.get("model", existing.model if existing else None),
+        )
+    return settings
+
+
+@functools.cache
+def get_settings() -> Settings:
+    """Return the parsed Settings, reusing an on-disk cache when nothing changed.
+
+    Pydantic env parsing dominates import time for short CLI runs, so the
+    finished Settings object is pickled to ~/.cache/imagai/settings.pkl keyed
+    by the .env mtime and the IMAGAI__* environment; unpickling skips all
+    validation.
+    """
+    key = _cache_key()
+    try:
+        with open(_CACHE_FILE, "rb") as f:
+            cached_key, settings = pickle.load(f)
+        if cached_key == key:
+            return settings
+    except Exception:
+        pass
+    settings = _build_settings()
+    try:
+        _CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_CACHE_FILE.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((key, settings), f)
+        os.replace(tmp_path, _CACHE_FILE)
+    except Exception:
+        pass
+    return settings
 
-from pathlib import Path
 
-Path(settings.output_dir).mkdir(parents=True, exist_ok=True)
+def __getattr__(name: str):
+    # Keep `from imagai.config import settings` working without paying the
+    # parse cost in modules that never touch it.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
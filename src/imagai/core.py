@@ -4,17 +4,104 @@ from imagai.providers.openai_sdk_provider import OpenAISDKProvider
 from imagai.utils import (
     save_image_from_url,
     save_image_from_b64,
+    close_download_clients,
+    close_filename_clients,
     generate_filename,
     generate_random_filename,
     generate_filename_from_prompt_llm,
     get_image_extension,
 )
 from pathlib import Path
+import asyncio
+import atexit
 import logging
-from typing import List
+import os
+from typing import Dict, List
 
 logger = logging.getLogger(__name__)
 
+# Providers (and their pooled HTTP clients) are cached per engine so repeated
+# generations in one process reuse connections instead of paying TCP/TLS
+# setup per call.
+_provider_cache: Dict[str, OpenAISDKProvider] = {}
+
+
+def _get_provider(engine_name: str) -> OpenAISDKProvider:
+    provider = _provider_cache.get(engine_name)
+    if provider is None:
+        provider = OpenAISDKProvider(settings.engines[engine_name])
+        _provider_cache[engine_name] = provider
+    return provider
+
+
+@atexit.register
+def _close_providers() -> None:
+    providers = list(_provider_cache.values())
+    _provider_cache.clear()
+
+    async def _close_all():
+        for provider in providers:
+            try:
+                await provider.close()
+            except Exception:
+                pass
+        await close_download_clients()
+        await close_filename_clients()
+
+    try:
+        asyncio.run(_close_all())
+    except Exception:
+        pass
+
+
+async def _pick_filename_strategy(request: ImageGenerationRequest):
+    """Return a make_filename(i) callable with all invariant work precomputed.
+
+    The explicit/LLM/random/prompt-derived choice only depends on the request,
+    so the branch (and any stem/suffix split or LLM round-trip) runs once per
+    batch; the per-image loop just calls the closure.
+    """
+    n = request.n or 1
+    base_filename = request.output_filename
+    output_ext = "png"
+    if base_filename:
+        output_ext = get_image_extension(base_filename)
+        stem, _ = os.path.splitext(base_filename)
+        if n > 1:
+            return lambda i: f"{stem}_{i + 1}.{output_ext}"
+        return lambda i: base_filename
+    if request.auto_filename:
+        llm_filename = await generate_filename_from_prompt_llm(
+            prompt=request.prompt, extension=output_ext, verbose=request.verbose
+        )
+        stem, ext = os.path.splitext(llm_filename)
+        if n > 1:
+            return lambda i: f"{stem}_{i + 1}{ext}"
+        return lambda i: llm_filename
+    if request.random_filename:
+        if n > 1:
+
+            def _random_suffixed(i: int) -> str:
+                stem, ext = os.path.splitext(
+                    generate_random_filename(extension=output_ext)
+                )
+                return f"{stem}_{i + 1}{ext}"
+
+            return _random_suffixed
+        return lambda i: generate_random_filename(extension=output_ext)
+    if n > 1:
+        # Suffix like the other branches: the prompt-derived name is
+        # timestamped per second, so concurrent saves would otherwise all
+        # resolve to the same file.
+        def _prompt_suffixed(i: int) -> str:
+            stem, ext = os.path.splitext(
+                generate_filename(prompt=request.prompt, extension=output_ext)
+            )
+            return f"{stem}_{i + 1}{ext}"
+
+        return _prompt_suffixed
+    return lambda i: generate_filename(prompt=request.prompt, extension=output_ext)
+
 
 async def generate_image_core(
     request: ImageGenerationRequest,
@@ -25,13 +112,25 @@ async def generate_image_core(
         logger.error(error_msg)
         return [ImageGenerationResponse(error=error_msg)]
     engine_config = settings.engines[engine_name]
-    provider = OpenAISDKProvider(engine_config)
+    # Created lazily here (not at config import time) so commands that never
+    # generate an image don't touch the filesystem.
+    Path(settings.output_dir).mkdir(parents=True, exist_ok=True)
+    provider = _get_provider(engine_name)
     final_responses: List[ImageGenerationResponse] = []
     try:
         api_responses = await provider.generate_image(request)
+        # Phase 1: decide which responses need saving and compute their
+        # output paths (filename logic is pure apart from the LLM variant).
+        savable: List[list] = []  # [response, filename, original index]
+        results_by_index: dict = {}
+        model_name = (
+            engine_config.model
+            if hasattr(engine_config, "model")
+            else str(engine_config)
+        )
         for i, api_response in enumerate(api_responses):
             if api_response.error:
-                final_responses.append(api_response)
+                results_by_index[i] = api_response
                 continue
             # If we received a text-only response (e.g., OpenRouter chat-based vision),
             # skip image-saving logic and return the text content without error.
@@ -40,46 +139,17 @@ async def generate_image_core(
                 and not getattr(api_response, "image_url", None)
                 and not getattr(api_response, "image_b64_json", None)
             ):
-                final_responses.append(api_response)
+                results_by_index[i] = api_response
                 continue
-            base_filename = request.output_filename
-            output_ext = "png"
-            if base_filename:
-                output_ext = get_image_extension(base_filename)
-                if request.n > 1:
-                    name_part, _ = Path(base_filename).stem, Path(base_filename).suffix
-                    current_filename = f"{name_part}_{i + 1}.{output_ext}"
-                else:
-                    current_filename = base_filename
-            elif request.auto_filename:
-                current_filename = await generate_filename_from_prompt_llm(
-                    prompt=request.prompt, extension=output_ext, verbose=request.verbose
-                )
-                if request.n > 1:
-                    name_part, ext_part = (
-                        Path(current_filename).stem,
-                        Path(current_filename).suffix,
-                    )
-                    current_filename = f"{name_part}_{i + 1}{ext_part}"
-            elif request.random_filename:
-                current_filename = generate_random_filename(extension=output_ext)
-                if request.n > 1:
-                    name_part, ext_part = (
-                        Path(current_filename).stem,
-                        Path(current_filename).suffix,
-                    )
-                    current_filename = f"{name_part}_{i + 1}{ext_part}"
-            else:
-                current_filename = generate_filename(
-                    prompt=request.prompt, extension=output_ext
-                )
-            output_file_path = Path(settings.output_dir) / current_filename
+            savable.append([api_response, None, i])
+        if savable:
+            make_filename = await _pick_filename_strategy(request)
+            for entry in savable:
+                entry[1] = make_filename(entry[2])
+
+        # Phase 2: dispatch all downloads/decodes/writes concurrently.
+        async def _save(api_response, output_file_path: Path):
             saved_path = None
-            model_name = (
-                engine_config.model
-                if hasattr(engine_config, "model")
-                else str(engine_config)
-            )
             if api_response.image_url:
                 saved_path = await save_image_from_url(
                     api_response.image_url, output_file_path, request.prompt, model_name
@@ -97,13 +167,29 @@ async def generate_image_core(
                 api_response.error = (
                     api_response.error or f"Failed to save image to {output_file_path}"
                 )
-            final_responses.append(api_response)
+            return api_response
+
+        if savable:
+            saved_responses = await asyncio.gather(
+                *(
+                    _save(api_response, Path(settings.output_dir) / current_filename)
+                    for api_response, current_filename, _ in savable
+                ),
+                return_exceptions=True,
+            )
+            for (_, _, i), result in zip(savable, saved_responses):
+                if isinstance(result, BaseException):
+                    results_by_index[i] = ImageGenerationResponse(
+                        error=f"Save failed: {result}"
+                    )
+                else:
+                    results_by_index[i] = result
+        final_responses.extend(
+            results_by_index[i] for i in sorted(results_by_index)
+        )
     except Exception as e:
         logger.exception(
             f"An unexpected error occurred in generate_image_core for engine {engine_name}: {e}"
         )
         return [ImageGenerationResponse(error=f"Core generation error: {e}")]
-    finally:
-        if "provider" in locals() and hasattr(provider, "close"):
-            await provider.close()
     return final_responses
@@ -1,27 +1,30 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from dataclasses import dataclass, field
+from typing import Optional
 
 
-class ImageGenerationRequest(BaseModel):
+# Plain slotted dataclasses: these objects only travel between the CLI/web
+# layer and the provider, so Pydantic validation (and its import-time schema
+# build) is unnecessary — the CLI enforces choices via typer and the API
+# rejects anything else.
+@dataclass(slots=True)
+class ImageGenerationRequest:
     prompt: str
     engine: str
     output_filename: Optional[str] = None
-    size: Optional[
-        Literal["256x256", "512x512", "1024x1024", "1792x1024", "1024x1792"]
-    ] = "1024x1024"
-    quality: Optional[Literal["standard", "hd"]] = "standard"
-    n: Optional[int] = Field(
-        1, ge=1, le=10, description="Number of images to generate."
-    )
-    style: Optional[Literal["vivid", "natural"]] = "vivid"
-    response_format: Optional[Literal["url", "b64_json"]] = "url"
-    extra_params: Optional[dict] = None
+    size: Optional[str] = "1024x1024"
+    quality: Optional[str] = "standard"
+    n: Optional[int] = 1
+    style: Optional[str] = "vivid"
+    response_format: Optional[str] = "url"
+    extra_params: dict = field(default_factory=dict)
     verbose: bool = False
     auto_filename: bool = False
     random_filename: bool = False
+    no_cache: bool = False
 
 
-class ImageGenerationResponse(BaseModel):
+@dataclass(slots=True)
+class ImageGenerationResponse:
     image_url: Optional[str] = None
     image_b64_json: Optional[str] = None
     saved_path: Optional[str] = None
@@ -0,0 +1,4 @@
+from imagai.providers.base_provider import BaseImageProvider
+from imagai.providers.openai_sdk_provider import OpenAISDKProvider
+
+__all__ = ["BaseImageProvider", "OpenAISDKProvider"]
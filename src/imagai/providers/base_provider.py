@@ -4,6 +4,8 @@ from typing import List
 
 
 class BaseImageProvider(ABC):
+    __slots__ = ()
+
     @abstractmethod
     async def generate_image(
         self, request: ImageGenerationRequest
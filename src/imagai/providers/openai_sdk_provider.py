@@ -1,11 +1,19 @@
+import asyncio
 import httpx
 import os
-from openai import OpenAI, AsyncOpenAI
+import sys
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, APIStatusError
 from openai.types.images_response import Image
 from imagai.config import EngineConfig
 from imagai.models import ImageGenerationRequest, ImageGenerationResponse
 from imagai.providers.base_provider import BaseImageProvider
+from imagai.utils import (
+    generation_cache_get,
+    generation_cache_key,
+    generation_cache_set,
+)
 from typing import List
+from enum import Enum
 import logging
 import json
 from rich.console import Console
@@ -13,51 +21,186 @@ from rich.table import Table
 
 logger = logging.getLogger(__name__)
 
+# One Console for the module; building one per response is measurable overhead.
+_console = Console()
+
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode()
+except ImportError:  # optional speedup, stdlib fallback
+
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, indent=2, default=str)
+
+
+# Parameters that Stability-style endpoints accept through extra_body.
+STABILITY_PARAMS = frozenset(
+    ("negative_prompt", "seed", "strength", "output_format", "aspect_ratio", "mode")
+)
+
+
+class ModelFamily(Enum):
+    DALLE3 = "dalle3"
+    DALLE2 = "dalle2"
+    STABILITY_SD3 = "stability_sd3"
+    STABILITY_OTHER = "stability_other"
+    OTHER = "other"
+
+
+def _classify_model(model_lower: str) -> ModelFamily:
+    if "dall-e-3" in model_lower:
+        return ModelFamily.DALLE3
+    if "dall-e-2" in model_lower:
+        return ModelFamily.DALLE2
+    if "stability" in model_lower:
+        if "sd3" in model_lower:
+            return ModelFamily.STABILITY_SD3
+        return ModelFamily.STABILITY_OTHER
+    return ModelFamily.OTHER
+
 
 class OpenAISDKProvider(BaseImageProvider):
+    __slots__ = (
+        "config",
+        "client_params",
+        "async_client",
+        "_sync_client",
+        "_family",
+        "_build_kwargs",
+        "_model",
+        "_openrouter_gemini",
+        "_openrouter_headers",
+        "_image_model",
+    )
+
     def __init__(self, engine_config: EngineConfig):
         self.config = engine_config
+        # Retry transient failures (429s, connection resets) inside the SDK
+        # with its exponential backoff instead of surfacing them; the connect
+        # timeout fails fast on dead endpoints while slow generations still
+        # get a full minute.
         self.client_params = {
             "api_key": self.config.api_key,
+            "max_retries": 5,
+            "timeout": httpx.Timeout(60.0, connect=10.0),
         }
         if self.config.base_url:
             self.client_params["base_url"] = str(self.config.base_url)
-        self.async_client = AsyncOpenAI(**self.client_params)
+        # Explicit pooled transport: providers are cached for the life of the
+        # process, so keep-alive (and HTTP/2 multiplexing where supported)
+        # amortizes TCP/TLS setup across requests. The aiohttp backend holds
+        # up far better than httpx under concurrent load, so prefer it when
+        # the openai[aiohttp] extra is installed.
+        http_client = self._make_http_client()
+        self.async_client = AsyncOpenAI(**self.client_params, http_client=http_client)
+        self._sync_client = None
+        # Model dispatch is a function of the config, so classify once here
+        # instead of re-scanning model-name substrings per request, and bind
+        # the matching kwargs builder so generate_image carries no per-call
+        # family branching.
+        self._model = self.config.model or "dall-e-3"
+        model_lower = self._model.lower()
+        self._family = _classify_model(model_lower)
+        # OpenRouter Gemini models go through chat.completions; this too is
+        # purely a function of the config.
+        self._openrouter_gemini = (
+            self.config.base_url is not None
+            and "openrouter.ai" in str(self.config.base_url)
+            and "gemini" in model_lower
+        )
+        self._image_model = "image" in model_lower
+        # Optional OpenRouter ranking headers; read the env once — it doesn't
+        # change mid-process.
+        self._openrouter_headers = {}
+        ref = os.environ.get("OPENROUTER_HTTP_REFERER")
+        ttl = os.environ.get("OPENROUTER_X_TITLE")
+        if ref:
+            self._openrouter_headers["HTTP-Referer"] = ref
+        if ttl:
+            self._openrouter_headers["X-Title"] = ttl
+        if self._family is ModelFamily.DALLE3:
+            self._build_kwargs = self._dalle3_kwargs
+        elif self._family in (ModelFamily.STABILITY_SD3, ModelFamily.STABILITY_OTHER):
+            self._build_kwargs = self._stability_kwargs
+        else:
+            self._build_kwargs = self._generic_kwargs
+
+    @staticmethod
+    def _make_http_client():
+        try:
+            from openai import DefaultAioHttpClient
+
+            return DefaultAioHttpClient()
+        except (ImportError, RuntimeError):  # openai[aiohttp] extra not installed
+            pass
+        try:
+            return httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+                http2=True,
+            )
+        except ImportError:  # http2 extra (h2) not installed
+            return httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+            )
+
+    def _get_sync_client(self) -> OpenAI:
+        if self._sync_client is None:
+            self._sync_client = OpenAI(**self.client_params)
+        return self._sync_client
+
+    def _generic_kwargs(self, request: ImageGenerationRequest) -> dict:
+        return {
+            "model": self._model,
+            "prompt": request.prompt,
+            "n": request.n or 1,
+            "size": request.size or "1024x1024",
+            "response_format": request.response_format or "url",
+        }
+
+    def _dalle3_kwargs(self, request: ImageGenerationRequest) -> dict:
+        kwargs = self._generic_kwargs(request)
+        kwargs["quality"] = request.quality
+        kwargs["style"] = request.style
+        return kwargs
+
+    def _stability_kwargs(self, request: ImageGenerationRequest) -> dict:
+        # Stability-style endpoints take no 'n'/'response_format'; options go
+        # through extra_body instead.
+        extra_body = {
+            k: v
+            for k, v in request.extra_params.items()
+            if k in STABILITY_PARAMS and v is not None
+        }
+        if "mode" not in extra_body and self._family is ModelFamily.STABILITY_OTHER:
+            extra_body["mode"] = "text-to-image"
+        kwargs = {
+            "model": self._model,
+            "prompt": request.prompt,
+        }
+        # Prefer aspect_ratio over size when explicitly provided.
+        if "aspect_ratio" not in extra_body:
+            kwargs["size"] = request.size or "1024x1024"
+        if extra_body:
+            kwargs["extra_body"] = extra_body
+        return kwargs
 
     async def generate_image(
         self, request: ImageGenerationRequest
     ) -> List[ImageGenerationResponse]:
         responses: List[ImageGenerationResponse] = []
         try:
-            # Detect OpenRouter endpoint
-            is_openrouter = False
-            if getattr(self.config, "base_url", None):
-                try:
-                    is_openrouter = "openrouter.ai" in str(self.config.base_url)
-                except Exception:
-                    is_openrouter = False
-
-            model_name = self.config.model or "dall-e-3"
+            model_name = self._model
 
             # If using OpenRouter with a Gemini model or chat-only model, use chat.completions
-            if is_openrouter and ("gemini" in model_name.lower()):
-                client = OpenAI(**self.client_params)
-                # Optional OpenRouter ranking headers from env
-                extra_headers = {}
-                ref = os.environ.get("OPENROUTER_HTTP_REFERER")
-                ttl = os.environ.get("OPENROUTER_X_TITLE")
-                if ref:
-                    extra_headers["HTTP-Referer"] = ref
-                if ttl:
-                    extra_headers["X-Title"] = ttl
+            if self._openrouter_gemini:
+                client = self._get_sync_client()
+                extra_headers = self._openrouter_headers
 
                 # Build messages; allow vision via extra_params.image_url
-                content_items = []
-                if request.prompt:
-                    content_items.append({"type": "text", "text": request.prompt})
-                img_url = None
-                if getattr(request, "extra_params", None):
-                    img_url = request.extra_params.get("image_url")
+                content_items = [{"type": "text", "text": request.prompt or ""}]
+                img_url = request.extra_params.get("image_url")
                 if img_url:
                     content_items.append(
                         {
@@ -65,17 +208,10 @@ class OpenAISDKProvider(BaseImageProvider):
                             "image_url": {"url": img_url},
                         }
                     )
-                messages = [
-                    {
-                        "role": "user",
-                        "content": content_items
-                        if content_items
-                        else [{"type": "text", "text": request.prompt or ""}],
-                    }
-                ]
+                messages = [{"role": "user", "content": content_items}]
                 
                 # Check if this is an image generation model
-                is_image_model = "image" in model_name.lower()
+                is_image_model = self._image_model
                 extra_body = {}
                 if is_image_model:
                     extra_body["modalities"] = ["image", "text"]
@@ -84,14 +220,13 @@ class OpenAISDKProvider(BaseImageProvider):
                     print("--- OpenRouter Chat.Completions Request ---")
                     try:
                         print(
-                            json.dumps(
+                            _json_dumps(
                                 {
                                     "model": model_name,
                                     "messages": messages,
                                     "extra_headers": extra_headers or None,
                                     "extra_body": extra_body if extra_body else None,
-                                },
-                                indent=2,
+                                }
                             )
                         )
                     except Exception:
@@ -132,11 +267,14 @@ class OpenAISDKProvider(BaseImageProvider):
                 if is_image_model and content and content.startswith("data:image/"):
                     # Extract base64 data from data URL
                     try:
-                        base64_data = content.split(",", 1)[1]
+                        # Slice from the comma instead of split(): no copy of
+                        # the data-URL prefix, and only one new string for
+                        # what can be a multi-MB payload.
+                        base64_data = content[content.index(",") + 1 :]
                         resp.image_b64_json = base64_data
                         if request.verbose:
                             print(f"DEBUG: Extracted base64 image data (length: {len(base64_data)})")
-                    except (IndexError, TypeError) as e:
+                    except (ValueError, TypeError) as e:
                         resp.error = f"Failed to extract image data from content: {e}"
                         resp.text_content = content  # Fallback to text
                 elif is_image_model and images:
@@ -144,11 +282,11 @@ class OpenAISDKProvider(BaseImageProvider):
                     try:
                         image_data = images[0]["image_url"]["url"]
                         if image_data.startswith("data:image/"):
-                            base64_data = image_data.split(",", 1)[1]
+                            base64_data = image_data[image_data.index(",") + 1 :]
                             resp.image_b64_json = base64_data
                         else:
                             resp.image_url = image_data
-                    except (KeyError, IndexError, TypeError) as e:
+                    except (KeyError, IndexError, ValueError, TypeError) as e:
                         resp.error = f"Failed to extract image data: {e}"
                 else:
                     # Regular text content
@@ -175,127 +313,136 @@ class OpenAISDKProvider(BaseImageProvider):
                 responses.append(resp)
                 return responses
 
-            kwargs = {
-                "model": model_name,
-                "prompt": request.prompt,
-                "n": request.n or 1,
-                "size": request.size or "1024x1024",
-                "response_format": request.response_format or "url",
-            }
-
-            if self.config.model and "dall-e-3" in self.config.model:
-                kwargs["quality"] = request.quality
-                kwargs["style"] = request.style
-
-            if self.config.model and "stability" in self.config.model.lower():
-                # For Stability AI models, 'n' is typically not used or handled differently.
-                # The AvalAI examples, which this provider might be used with via base_url, don't show 'n'.
-                if "n" in kwargs:
-                    del kwargs["n"]
-                if "response_format" in kwargs:
-                    del kwargs["response_format"]
-
-                stability_specific_params = [
-                    "negative_prompt",
-                    "seed",
-                    "strength",
-                    "output_format",
-                    "aspect_ratio",
-                    "mode",
-                ]
-                extra_body = {}
-
-                # Populate stability-specific params directly into kwargs from request.extra_params if provided
-                if hasattr(request, "extra_params") and request.extra_params:
-                    for key in stability_specific_params:
-                        if key in request.extra_params and request.extra_params[key] is not None:
-                            extra_body[key] = request.extra_params[key]
-
-                # Handle 'mode' parameter logic for Stability AI
-                if "mode" not in extra_body:
-                    if "sd3" not in self.config.model.lower():
-                        extra_body["mode"] = "text-to-image"
+            kwargs = self._build_kwargs(request)
 
-                # Handle potential conflict between 'size' and 'aspect_ratio'
-                if "aspect_ratio" in extra_body and "size" in kwargs:
-                    del kwargs["size"]  # Prefer aspect_ratio if explicitly provided
-
-                if extra_body:
-                    kwargs["extra_body"] = extra_body
+            cache_key = None
+            if not request.no_cache:
+                # Key on the request fields, not the provider kwargs: builders
+                # like _stability_kwargs omit n, which would collapse n=1 and
+                # n=4 batches onto one entry.
+                cache_key = generation_cache_key(
+                    request.engine,
+                    {
+                        "model": self._model,
+                        "prompt": request.prompt,
+                        "n": request.n or 1,
+                        "size": request.size,
+                        "quality": request.quality,
+                        "style": request.style,
+                        "response_format": request.response_format,
+                        "extra_params": request.extra_params,
+                    },
+                )
+                cached = generation_cache_get(cache_key)
+                if cached is not None:
+                    if request.verbose:
+                        print("--- Generation cache hit (use --no-cache to bypass) ---")
+                    return cached
 
             if request.verbose:
                 print("--- API Request Body ---")
                 try:
-                    print(json.dumps(kwargs, indent=2, default=str))
+                    print(_json_dumps(kwargs))
                 except TypeError:
                     print(kwargs)
                 print("------------------------")
 
-            api_response = await self.async_client.images.generate(**kwargs)
-            usage = getattr(api_response, "usage", None)
-            estimated_cost = getattr(api_response, "estimated_cost", None)
-            for image_data in api_response.data:
-                img_response = ImageGenerationResponse()
-                if image_data.url:
-                    img_response.image_url = image_data.url
-                elif image_data.b64_json:
-                    img_response.image_b64_json = image_data.b64_json
-                else:
-                    img_response.error = "No image data found in API response."
-                img_response.usage = usage
-                img_response.estimated_cost = estimated_cost
-                responses.append(img_response)
-
-            console = Console()
-            table = Table(
-                title="API Usage & Cost Info",
-                show_header=True,
-                header_style="bold magenta",
-            )
-            table.add_column("Category", style="cyan", width=15)
-            table.add_column("Attribute", style="green", width=20)
-            table.add_column("Value", style="yellow")
-
-            has_data_to_display = False
-
-            if usage:
-                attributes_to_check = [
-                    "input_tokens",
-                    "output_tokens",
-                    "total_tokens",
-                    "input_tokens_details",
-                ]
-                usage_details_added = False
-                for attr in attributes_to_check:
-                    if hasattr(usage, attr):
-                        value = getattr(usage, attr)
-                        table.add_row(
-                            "Usage",
-                            attr,
-                            str(value) if value is not None else "N/A",
+            if (
+                self._family
+                in (ModelFamily.STABILITY_SD3, ModelFamily.STABILITY_OTHER)
+                and (request.n or 1) > 1
+            ):
+                # Stability-style endpoints ignore 'n', so honour --num-images
+                # by fanning out N concurrent calls over the shared pool.
+                api_results = await asyncio.gather(
+                    *(
+                        self.async_client.images.generate(**kwargs)
+                        for _ in range(request.n)
+                    ),
+                    return_exceptions=True,
+                )
+            else:
+                api_results = [await self.async_client.images.generate(**kwargs)]
+
+            usage = None
+            estimated_cost = None
+            for api_response in api_results:
+                if isinstance(api_response, BaseException):
+                    responses.append(ImageGenerationResponse(error=str(api_response)))
+                    continue
+                usage = getattr(api_response, "usage", None)
+                estimated_cost = getattr(api_response, "estimated_cost", None)
+                for image_data in api_response.data:
+                    img_response = ImageGenerationResponse()
+                    if image_data.url:
+                        img_response.image_url = image_data.url
+                    elif image_data.b64_json:
+                        img_response.image_b64_json = image_data.b64_json
+                    else:
+                        img_response.error = "No image data found in API response."
+                    img_response.usage = usage
+                    img_response.estimated_cost = estimated_cost
+                    responses.append(img_response)
+
+            # Rendering the rich table costs real CPU per response; only do it
+            # when someone is actually watching (skip piped/CI output).
+            if sys.stdout.isatty():
+                table = Table(
+                    title="API Usage & Cost Info",
+                    show_header=True,
+                    header_style="bold magenta",
+                )
+                table.add_column("Category", style="cyan", width=15)
+                table.add_column("Attribute", style="green", width=20)
+                table.add_column("Value", style="yellow")
+
+                has_data_to_display = False
+
+                if usage:
+                    # One model_dump() beats probing each attribute with
+                    # hasattr/getattr reflection.
+                    try:
+                        usage_dict = (
+                            usage.model_dump(exclude_none=True)
+                            if hasattr(usage, "model_dump")
+                            else dict(usage)
                         )
-                        usage_details_added = True
+                    except Exception:
+                        usage_dict = {"Raw Data": usage}
+                    for attr, value in usage_dict.items():
+                        table.add_row("Usage", attr, str(value))
                         has_data_to_display = True
 
-                if not usage_details_added:
-                    # Fallback if no known attributes found, print str(usage)
-                    table.add_row("Usage", "Raw Data", str(usage))
-                    has_data_to_display = True
+                if estimated_cost:  # This is a dict
+                    for key, value in estimated_cost.items():
+                        table.add_row("Estimated Cost", key, str(value))
+                        has_data_to_display = True
 
-            if estimated_cost:  # This is a dict
-                for key, value in estimated_cost.items():
-                    table.add_row("Estimated Cost", key, str(value))
-                    has_data_to_display = True
+                if has_data_to_display:
+                    _console.print(table)
+                else:
+                    _console.print("No usage or cost information available.")
 
-            if has_data_to_display:
-                console.print(table)
-            else:
-                console.print("No usage or cost information available.")
+            # Snapshot successful batches before core.py mutates them with
+            # saved paths; failed/partial batches are never cached.
+            if cache_key is not None and responses and not any(
+                r.error for r in responses
+            ):
+                generation_cache_set(cache_key, responses)
 
             return responses
+        except (APIStatusError, APIConnectionError) as e:
+            # The SDK already retried these with backoff; what remains is a
+            # genuine API/network failure.
+            logger.error(
+                "API error generating image with engine %s: %s", request.engine, e
+            )
+            return [ImageGenerationResponse(error=str(e))]
         except Exception as e:
-            logger.error(f"Error generating image with engine {request.engine}: {e}")
+            logger.error("Error generating image with engine %s: %s", request.engine, e)
             return [ImageGenerationResponse(error=str(e))]
 
     async def close(self):
         await self.async_client.close()
+        if self._sync_client is not None:
+            self._sync_client.close()
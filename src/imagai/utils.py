@@ -1,10 +1,34 @@
+import aiofiles
+import asyncio
 import httpx
-import base64
+
+try:
+    # SIMD-accelerated base64; same signature as the stdlib function.
+    from pybase64 import b64decode as _b64decode_raw
+except ImportError:
+    from base64 import b64decode as _b64decode_raw
+
+
+def _b64decode(data):
+    # pybase64 only takes its SIMD path when validating; API payloads are
+    # clean base64, so decode strict and fall back to the lenient scrub for
+    # the odd payload with stray whitespace.
+    try:
+        return _b64decode_raw(data, validate=True)
+    except Exception:
+        return _b64decode_raw(data)
 from pathlib import Path
-from datetime import datetime
 from PIL import Image
+import hashlib
 import io
+import json
 import logging
+import os
+import pickle
+import struct
+import tempfile
+import time
+import zlib
 from typing import Optional
 import uuid
 import re
@@ -14,11 +38,104 @@ from PIL import PngImagePlugin
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        # orjson emits UTF-8 directly, so non-ASCII prompts stay readable.
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str).decode()
+except ImportError:  # optional speedup, stdlib fallback
+
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str)
+
+# Download clients are cached per event loop (an AsyncClient must not be
+# reused across loops) so N-image batches share one keep-alive pool instead
+# of paying a TLS handshake per download.
+_download_clients: dict = {}
+
+
+def get_download_client() -> httpx.AsyncClient:
+    """Return the shared image-download client for the running event loop."""
+    loop_id = id(asyncio.get_running_loop())
+    client = _download_clients.get(loop_id)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_keepalive_connections=64,
+            max_connections=256,
+            keepalive_expiry=30,
+        )
+        # httpx's 5 s default is too tight for multi-MB image downloads.
+        timeout = httpx.Timeout(30.0)
+        try:
+            client = httpx.AsyncClient(http2=True, limits=limits, timeout=timeout)
+        except ImportError:  # http2 extra (h2) not installed
+            client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        _download_clients[loop_id] = client
+    return client
+
+
+async def close_download_clients() -> None:
+    """Close every cached download client (CLI/server shutdown hook)."""
+    clients = list(_download_clients.values())
+    _download_clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception:
+            pass
+
+
+# Filename-generation LLM clients, cached per (loop, api_key, base_url) like
+# the download clients above so repeated --auto-filename calls reuse one
+# connection pool instead of a fresh TLS handshake each time.
+_filename_clients: dict = {}
+
+
+def _get_filename_client(api_key: str, base_url: Optional[str]) -> AsyncOpenAI:
+    key = (id(asyncio.get_running_loop()), api_key, base_url)
+    client = _filename_clients.get(key)
+    if client is None:
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        _filename_clients[key] = client
+    return client
+
+
+async def close_filename_clients() -> None:
+    """Close every cached filename-generation client (shutdown hook)."""
+    clients = list(_filename_clients.values())
+    _filename_clients.clear()
+    for client in clients:
+        try:
+            await client.close()
+        except Exception:
+            pass
+
+
+# Precompiled once: these run on every generated filename.
+_SANITIZE_BAD_RE = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+_SANITIZE_WS_RE = re.compile(r"\s+")
+# \w keeps Unicode letters/digits like the old per-char isalnum() check did;
+# space and '-' survive, everything else becomes '_' in one C-level pass.
+_FILENAME_SANE_RE = re.compile(r"[^\w \-]")
+
+# strftime is expensive enough to matter when naming many files in a batch;
+# the formatted timestamp only changes once per second, so cache it.
+_ts_cache = [0, ""]
+
+
+def _timestamp() -> str:
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache[0] = now
+        _ts_cache[1] = time.strftime("%Y%m%d_%H%M%S", time.localtime(now))
+    return _ts_cache[1]
+
 
 def sanitize_filename(name: str) -> str:
     """Sanitizes a string to be a valid filename."""
-    name = re.sub(r'[<>:"/\\\\|?*\\x00-\\x1F]', "_", name)
-    name = re.sub(r"\s+", "_", name)
+    name = _SANITIZE_BAD_RE.sub("_", name)
+    name = _SANITIZE_WS_RE.sub("_", name)
     name = name[:100]
     return name
 
@@ -57,9 +174,9 @@ async def generate_filename_from_prompt_llm(
         )
         return generate_filename(prompt, extension)
 
-    client = AsyncOpenAI(
-        api_key=filename_engine_config.api_key,
-        base_url=str(filename_engine_config.base_url)
+    client = _get_filename_client(
+        filename_engine_config.api_key,
+        str(filename_engine_config.base_url)
         if filename_engine_config.base_url
         else None,
     )
@@ -84,9 +201,7 @@ async def generate_filename_from_prompt_llm(
         print("--- LLM Filename Generation Request ---")
         print(f"Model: {model}")
         print(f"Prompt: {prompt}")
-        import json
-
-        print(json.dumps(request_json, indent=2, ensure_ascii=False))
+        print(_json_dumps(request_json))
         print("--------------------------------------")
     try:
         response = await client.chat.completions.create(
@@ -97,38 +212,29 @@ async def generate_filename_from_prompt_llm(
         )
         if verbose:
             print("--- LLM Filename Generation Response ---")
-            print(
-                json.dumps(
-                    response.choices[0].message.content, indent=2, ensure_ascii=False
-                )
-            )
+            print(_json_dumps(response.choices[0].message.content))
             print("--------------------------------------")
 
         raw_filename = response.choices[0].message.content.strip()
         sanitized = sanitize_filename(raw_filename)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = _timestamp()
         return f"{sanitized}_{timestamp}.{extension}"
     except Exception as e:
-        logger.error(f"Error generating filename with LLM: {e}. Using default method.")
+        logger.error("Error generating filename with LLM: %s. Using default method.", e)
         return generate_filename(prompt, extension)  # Fallback to default
-    finally:
-        if "client" in locals():
-            await client.close()
 
 
 def generate_random_filename(extension: str = "png") -> str:
     """Generates a random filename."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = _timestamp()
     random_str = str(uuid.uuid4())[:8]
     return f"image_{timestamp}_{random_str}.{extension}"
 
 
 def generate_filename(prompt: Optional[str] = None, extension: str = "png") -> str:
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = _timestamp()
     if prompt:
-        sane_prompt = "".join(
-            c if c.isalnum() or c in (" ", "-") else "_" for c in prompt[:30]
-        ).rstrip()
+        sane_prompt = _FILENAME_SANE_RE.sub("_", prompt[:30]).rstrip()
         sane_prompt = sane_prompt.replace(" ", "_")
         return f"{sane_prompt}_{timestamp}.{extension}"
     return f"image_{timestamp}.{extension}"
@@ -152,71 +258,265 @@ def _inject_metadata(
     return img
 
 
+# Parent directories already created by this process; repeat saves into the
+# same output dir skip the stat+mkdir syscalls.
+_dirs_seen: set = set()
+
+
+def _ensure_parent_dir(output_path: Path) -> None:
+    parent = str(output_path.parent)
+    if parent not in _dirs_seen:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        _dirs_seen.add(parent)
+
+
+def _sniff_image_format(header: bytes) -> Optional[str]:
+    """Identify PNG/JPEG/WebP/GIF from the first bytes of an image."""
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    return None
+
+
+def _format_matches(fmt: str, ext: str) -> bool:
+    return fmt == ext or (fmt == "jpeg" and ext in ("jpg", "jpeg"))
+
+
+def _png_insert_text(png: bytes, texts: dict) -> bytes:
+    """Splice tEXt chunks in after IHDR without decoding the image.
+
+    Values must be latin-1 encodable (the tEXt spec); callers fall back to
+    PIL (which switches to iTXt) when they aren't.
+    """
+    ihdr_len = int.from_bytes(png[8:12], "big")
+    # 8-byte signature, then IHDR: 4-byte length + type + data + CRC.
+    insert_at = 8 + 12 + ihdr_len
+    parts = [png[:insert_at]]
+    for key, value in texts.items():
+        data = key.encode("latin-1") + b"\x00" + value.encode("latin-1")
+        parts.append(struct.pack(">I", len(data)))
+        parts.append(b"tEXt")
+        parts.append(data)
+        parts.append(struct.pack(">I", zlib.crc32(b"tEXt" + data)))
+    parts.append(png[insert_at:])
+    return b"".join(parts)
+
+
+def _save_with_pil(
+    image_bytes: bytes, output_path: Path, prompt: str, model: str
+) -> Path:
+    ext = output_path.suffix[1:].lower()
+    if (
+        prompt
+        and model
+        and ext == "png"
+        and image_bytes[:8] == b"\x89PNG\r\n\x1a\n"
+    ):
+        # PNG in, PNG out: splice the metadata chunks directly instead of
+        # paying a full zlib decode + re-encode through PIL.
+        try:
+            spliced = _png_insert_text(
+                bytes(image_bytes), {"Prompt": prompt, "Model": model}
+            )
+        except UnicodeEncodeError:  # non-latin-1 prompt; PIL emits iTXt
+            spliced = None
+        if spliced is not None:
+            with open(output_path, "wb") as f:
+                f.write(spliced)
+            return output_path
+    img = Image.open(io.BytesIO(image_bytes))
+    if prompt and model:
+        img = _inject_metadata(img, prompt, model, ext)
+    if ext == "png" and "pnginfo" in img.info:
+        img.save(output_path, pnginfo=img.info["pnginfo"])
+    elif ext in ("jpg", "jpeg") and "exif" in img.info:
+        img.save(output_path, exif=img.info["exif"])
+    else:
+        img.save(output_path)
+    return output_path
+
+
 async def save_image_from_url(
     image_url: str, output_path: Path, prompt: str = None, model: str = None
 ) -> Optional[Path]:
     try:
-        async with httpx.AsyncClient() as client:
+        client = get_download_client()
+        _ensure_parent_dir(output_path)
+        ext = output_path.suffix[1:].lower()
+        if not (prompt and model):
+            # No metadata to inject: stream straight to disk when the wire
+            # format already matches the target extension, skipping the full
+            # decode + re-encode cycle (and the whole-image buffer).
+            async with client.stream("GET", image_url) as response:
+                response.raise_for_status()
+                chunks = response.aiter_bytes(1 << 16)
+                first_chunk = b""
+                async for chunk in chunks:
+                    first_chunk = chunk
+                    break
+                fmt = _sniff_image_format(first_chunk)
+                if fmt is not None and _format_matches(fmt, ext):
+                    async with aiofiles.open(output_path, "wb") as f:
+                        await f.write(first_chunk)
+                        async for chunk in chunks:
+                            await f.write(chunk)
+                    logger.info("Image saved to %s", output_path)
+                    return output_path
+                # Format conversion needed: buffer the rest and fall through.
+                image_bytes = bytearray(first_chunk)
+                async for chunk in chunks:
+                    image_bytes.extend(chunk)
+        else:
             response = await client.get(image_url)
             response.raise_for_status()
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+            image_bytes = response.content
         try:
-            img = Image.open(io.BytesIO(response.content))
-            ext = output_path.suffix[1:].lower()
-            if prompt and model:
-                img = _inject_metadata(img, prompt, model, ext)
-            if ext == "png" and "pnginfo" in img.info:
-                img.save(output_path, pnginfo=img.info["pnginfo"])
-            elif ext in ("jpg", "jpeg") and "exif" in img.info:
-                img.save(output_path, exif=img.info["exif"])
-            else:
-                img.save(output_path)
-            logger.info(f"Image saved to {output_path}")
+            # PIL decode/encode is CPU-bound C code; run it in a worker thread
+            # so concurrent downloads in the same gather aren't stalled.
+            await asyncio.to_thread(
+                _save_with_pil, bytes(image_bytes), output_path, prompt, model
+            )
+            logger.info("Image saved to %s", output_path)
             return output_path
         except Exception as e:
             logger.error(
-                f"Failed to process and save image from {image_url} to {output_path}: {e}"
+                "Failed to process and save image from %s to %s: %s",
+                image_url,
+                output_path,
+                e,
             )
             return None
     except httpx.HTTPStatusError as e:
         logger.error(
-            f"HTTP error downloading image {image_url}: {e.response.status_code} - {e.response.text}"
+            "HTTP error downloading image %s: %s - %s",
+            image_url,
+            e.response.status_code,
+            e.response.text,
         )
         return None
     except Exception as e:
-        logger.error(f"Error downloading or saving image {image_url}: {e}")
+        logger.error("Error downloading or saving image %s: %s", image_url, e)
         return None
 
 
+# Decode base64 in 4-char-aligned blocks (~64 KiB of output each) so peak
+# memory stays bounded no matter how large the payload is.
+_B64_CHUNK_CHARS = (65536 // 3) * 4
+
+# Chunked decoding (and the header sniff) need a pure-alphabet payload;
+# MIME-style base64 wrapped with newlines would misalign the 4-char blocks.
+_B64_CLEAN_RE = re.compile(r"[^A-Za-z0-9+/=]")
+
+
+def _decode_b64_to_file(b64_json: str, output_path: Path) -> None:
+    # Plain buffered writes: the stdlib coalesces the chunks into large
+    # syscalls, so the whole payload costs one executor dispatch instead of
+    # a thread-pool round trip per chunk.
+    with open(output_path, "wb") as f:
+        for i in range(0, len(b64_json), _B64_CHUNK_CHARS):
+            f.write(_b64decode(b64_json[i : i + _B64_CHUNK_CHARS]))
+
+
+async def _stream_b64_to_file(b64_json: str, output_path: Path) -> None:
+    await asyncio.to_thread(_decode_b64_to_file, b64_json, output_path)
+
+
+async def save_images(items: list) -> list:
+    """Download and save many (image_url, output_path) pairs concurrently.
+
+    All downloads multiplex over the shared client from
+    get_download_client(), so wall-clock time is max(t_i) instead of sum(t_i).
+    """
+    return await asyncio.gather(
+        *(save_image_from_url(url, path) for url, path in items)
+    )
+
+
 async def save_image_from_b64(
     b64_json: str, output_path: Path, prompt: str = None, model: str = None
 ) -> Optional[Path]:
     try:
-        image_bytes = base64.b64decode(b64_json)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        # The containment checks are cheap C scans; the scrub only runs for
+        # whitespace-wrapped payloads.
+        if "\n" in b64_json or "\r" in b64_json or " " in b64_json:
+            b64_json = _B64_CLEAN_RE.sub("", b64_json)
+        _ensure_parent_dir(output_path)
+        if not (prompt and model):
+            # No metadata to inject: when the payload already is the target
+            # format (sniffed from the first decoded bytes), skip the full
+            # in-memory decode and stream the payload to disk in bounded
+            # chunks; otherwise fall through to PIL for the conversion.
+            fmt = _sniff_image_format(_b64decode(b64_json[:20]))
+            if fmt is not None and _format_matches(fmt, output_path.suffix[1:].lower()):
+                await _stream_b64_to_file(b64_json, output_path)
+                logger.info("Image saved to %s", output_path)
+                return output_path
+        image_bytes = _b64decode(b64_json)
         try:
-            img = Image.open(io.BytesIO(image_bytes))
-            ext = output_path.suffix[1:].lower()
-            if prompt and model:
-                img = _inject_metadata(img, prompt, model, ext)
-            if ext == "png" and "pnginfo" in img.info:
-                img.save(output_path, pnginfo=img.info["pnginfo"])
-            elif ext in ("jpg", "jpeg") and "exif" in img.info:
-                img.save(output_path, exif=img.info["exif"])
-            else:
-                img.save(output_path)
-            logger.info(f"Image saved to {output_path}")
+            await asyncio.to_thread(
+                _save_with_pil, image_bytes, output_path, prompt, model
+            )
+            logger.info("Image saved to %s", output_path)
             return output_path
         except Exception as e:
-            logger.error(f"Failed to process and save b64 image to {output_path}: {e}")
+            logger.error("Failed to process and save b64 image to %s: %s", output_path, e)
             return None
     except Exception as e:
-        logger.error(f"Error decoding or saving base64 image: {e}")
+        logger.error("Error decoding or saving base64 image: %s", e)
+        return None
+
+
+# Disk-backed generation cache (same tempfile+os.replace pattern as the
+# settings cache in config.py): an identical prompt+params combination within
+# the TTL reuses the earlier API response instead of paying another billed,
+# multi-second call. Bypass with --no-cache.
+_GENERATION_CACHE_DIR = Path.home() / ".cache" / "imagai" / "generations"
+# Hosted image URLs (e.g. DALL-E) expire after about an hour, so entries
+# older than that are useless anyway.
+_GENERATION_CACHE_TTL = 3600
+
+
+def generation_cache_key(engine: str, kwargs: dict) -> str:
+    payload = json.dumps(
+        {"engine": engine, **kwargs}, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def generation_cache_get(key: str):
+    path = _GENERATION_CACHE_DIR / f"{key}.pkl"
+    try:
+        if time.time() - path.stat().st_mtime > _GENERATION_CACHE_TTL:
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
         return None
 
 
+def generation_cache_set(key: str, responses) -> None:
+    try:
+        _GENERATION_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_GENERATION_CACHE_DIR)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(responses, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _GENERATION_CACHE_DIR / f"{key}.pkl")
+    except Exception:
+        pass
+
+
+_VALID_EXTS = frozenset(("jpg", "jpeg", "png", "gif", "webp"))
+
+
 def get_image_extension(filename: str) -> str:
-    ext = Path(filename).suffix[1:].lower()
-    if ext in ["jpg", "jpeg", "png", "gif", "webp"]:
-        return ext
-    return "png"
+    # Called per saved image; plain string scanning avoids a Path allocation.
+    i = filename.rfind(".")
+    if i == -1:
+        return "png"
+    ext = filename[i + 1 :].lower()
+    return ext if ext in _VALID_EXTS else "png"
@@ -9,11 +9,38 @@ import sys
 import json
 import subprocess
 import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, List
 from datetime import datetime
-import base64
-import mimetypes
+
+try:
+    # SIMD-accelerated base64; same signatures as the stdlib functions.
+    from pybase64 import (
+        b64decode as _b64decode_raw,
+        b64encode as _b64encode,
+        b64encode_as_string as _b64encode_as_string,
+    )
+except ImportError:
+    from base64 import b64decode as _b64decode_raw, b64encode as _b64encode
+
+    def _b64encode_as_string(data) -> str:
+        return _b64encode(data).decode("ascii")
+
+
+def _b64decode(data):
+    # pybase64 only takes its SIMD path when validating; browser data URLs
+    # are clean base64, so decode strict with a lenient fallback.
+    try:
+        return _b64decode_raw(data, validate=True)
+    except Exception:
+        return _b64decode_raw(data)
+
+
+import mmap
 
 from flask import Flask, request, jsonify, send_from_directory, render_template_string
 from flask_cors import CORS
@@ -29,6 +56,26 @@ from imagai.models import ImageGenerationRequest
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Request bounds mirroring the CLI's choice parameters; the dataclass request
+# model doesn't validate, so the web path has to.
+_MAX_N = 10
+_VALID_SIZES = frozenset(
+    ("256x256", "512x512", "1024x1024", "1792x1024", "1024x1792")
+)
+_VALID_QUALITIES = frozenset(("standard", "hd"))
+_VALID_STYLES = frozenset(("vivid", "natural"))
+_VALID_RESPONSE_FORMATS = frozenset(("url", "b64_json"))
+
+# The output set is known; a dict lookup beats mimetypes.guess_type (which
+# lazily parses the system mime.types on first call).
+_MIME = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".gif": "image/gif",
+}
+
 # Configuration
 UPLOAD_FOLDER = Path("generated_images")
 UPLOAD_FOLDER.mkdir(exist_ok=True)
@@ -36,12 +83,18 @@ app.config["UPLOAD_FOLDER"] = str(UPLOAD_FOLDER)
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max file size
 
 
+@functools.lru_cache(maxsize=1)
+def _index_html() -> str:
+    with open("web_interface.html", "r", encoding="utf-8") as f:
+        return f.read()
+
+
 @app.route("/")
 def index():
     """Serve the main web interface"""
     try:
-        with open("web_interface.html", "r", encoding="utf-8") as f:
-            return f.read()
+        # Read once, serve from memory afterwards.
+        return _index_html()
     except FileNotFoundError:
         return (
             "Web interface file not found. Please ensure web_interface.html exists.",
@@ -103,6 +156,33 @@ def generate_image():
                 {"success": False, "error": f'Engine "{engine}" is not configured'}
             ), 400
 
+        # Validate the request bounds before anything is billed
+        try:
+            n = int(data.get("n", 1))
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "n must be an integer"}), 400
+        if not 1 <= n <= _MAX_N:
+            return jsonify(
+                {"success": False, "error": f"n must be between 1 and {_MAX_N}"}
+            ), 400
+        size = data.get("size", "1024x1024")
+        quality = data.get("quality", "standard")
+        style = data.get("style", "vivid")
+        response_format = data.get("response_format", "b64_json")
+        for field, value, valid in (
+            ("size", size, _VALID_SIZES),
+            ("quality", quality, _VALID_QUALITIES),
+            ("style", style, _VALID_STYLES),
+            ("response_format", response_format, _VALID_RESPONSE_FORMATS),
+        ):
+            if value not in valid:
+                return jsonify(
+                    {
+                        "success": False,
+                        "error": f'Invalid {field} "{value}"; allowed: {", ".join(sorted(valid))}',
+                    }
+                ), 400
+
         # Build extra parameters
         extra_params = {}
         param_mapping = {
@@ -123,57 +203,42 @@ def generate_image():
                 else:
                     extra_params[param_key] = data[key]
 
-        # Create request object
-        image_request = ImageGenerationRequest(
-            prompt=prompt,
-            engine=engine,
-            output_filename=data.get("output"),
-            n=int(data.get("n", 1)),
-            size=data.get("size", "1024x1024"),
-            quality=data.get("quality", "standard"),
-            style=data.get("style", "vivid"),
-            response_format=data.get("response_format", "b64_json"),
-            extra_params=extra_params,
-            verbose=data.get("verbose", False),
-            auto_filename=data.get("auto_filename", False),
-            random_filename=data.get("random_filename", False),
-        )
-
         # Process input image if provided
         if input_image:
             # Convert base64 data URL to bytes
             if input_image.startswith("data:image/"):
-                # Extract base64 data from data URL
-                header, encoded = input_image.split(",", 1)
-                image_data = base64.b64decode(encoded)
+                # Extract base64 data from the data URL; the comma sits in the
+                # short fixed-form prefix, so bound the search instead of
+                # scanning the whole (possibly multi-MB) string.
+                comma = input_image.index(",", 11, 64)
+                image_data = _b64decode(input_image[comma + 1 :])
                 # Add to extra_params for the core function
                 extra_params["input_image"] = image_data
             else:
                 # Assume it's already base64 encoded
-                image_data = base64.b64decode(input_image)
+                image_data = _b64decode(input_image)
                 extra_params["input_image"] = image_data
 
-        # Update the request object with processed input image
+        # Create request object (once, after extra_params is final)
         image_request = ImageGenerationRequest(
             prompt=prompt,
             engine=engine,
             output_filename=data.get("output"),
-            n=int(data.get("n", 1)),
-            size=data.get("size", "1024x1024"),
-            quality=data.get("quality", "standard"),
-            style=data.get("style", "vivid"),
-            response_format=data.get("response_format", "b64_json"),
+            n=n,
+            size=size,
+            quality=quality,
+            style=style,
+            response_format=response_format,
             extra_params=extra_params,
             verbose=data.get("verbose", False),
             auto_filename=data.get("auto_filename", False),
             random_filename=data.get("random_filename", False),
         )
 
-        # Generate image using core functionality
-        async def _generate():
-            return await generate_image_core(image_request)
-
-        results = asyncio.run(_generate())
+        # Generate image using core functionality on the shared loop
+        results = asyncio.run_coroutine_threadsafe(
+            generate_image_core(image_request), _event_loop()
+        ).result()
 
         # Process results
         response_data = {
@@ -192,21 +257,35 @@ def generate_image():
             if not result.error:
                 if result.saved_path:
                     result_data["saved_path"] = result.saved_path
-                    # Try to encode image as base64 for preview
-                    try:
-                        if os.path.exists(result.saved_path):
-                            with open(result.saved_path, "rb") as img_file:
-                                img_data = img_file.read()
-                                img_b64 = base64.b64encode(img_data).decode("utf-8")
-                                mime_type = (
-                                    mimetypes.guess_type(result.saved_path)[0]
-                                    or "image/png"
+                    # The core already holds the payload as base64 when
+                    # response_format is b64_json; build the preview straight
+                    # from it instead of re-reading and re-encoding the file.
+                    if result.image_b64_json:
+                        result_data["image_data"] = (
+                            f"data:image/png;base64,{result.image_b64_json}"
+                        )
+                    else:
+                        try:
+                            if os.path.exists(result.saved_path):
+                                # mmap avoids the read() copy, and
+                                # b64encode_as_string skips the intermediate
+                                # bytes object on the way to the data URL.
+                                with open(result.saved_path, "rb") as img_file:
+                                    with mmap.mmap(
+                                        img_file.fileno(),
+                                        0,
+                                        access=mmap.ACCESS_READ,
+                                    ) as mm:
+                                        img_b64 = _b64encode_as_string(mm)
+                                mime_type = _MIME.get(
+                                    os.path.splitext(result.saved_path)[1].lower(),
+                                    "image/png",
                                 )
                                 result_data["image_data"] = (
                                     f"data:{mime_type};base64,{img_b64}"
                                 )
-                    except Exception as e:
-                        result_data["preview_error"] = str(e)
+                        except Exception as e:
+                            result_data["preview_error"] = str(e)
 
                 if result.image_url:
                     result_data["image_url"] = result.image_url
@@ -224,6 +303,45 @@ def generate_image():
         ), 500
 
 
+# One long-lived loop in a daemon thread instead of asyncio.run per request:
+# skips the loop setup/teardown and, more importantly, keeps the pooled
+# httpx/AsyncOpenAI clients bound to a live loop between requests.
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+# Batch preview encoding: reads overlap with base64 encodes across workers.
+_ENCODE_POOL = ThreadPoolExecutor(max_workers=4)
+
+
+def _read_and_encode_png(entry_path: str, entry_name: str):
+    try:
+        # Encode straight from the mapped pages: no read() copy and no
+        # intermediate bytes object on the way to the data URL.
+        with open(entry_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                img_b64 = _b64encode_as_string(mm)
+        return {
+            "filename": entry_name,
+            "path": entry_path,
+            "data": f"data:image/png;base64,{img_b64}",
+        }
+    except Exception as e:
+        print(f"Error reading image {entry_path}: {e}")
+        return None
+
+
 @app.route("/api/generate-cli", methods=["POST"])
 def generate_image_cli():
     """Generate image using CLI command execution (alternative method)"""
@@ -265,26 +383,27 @@ def generate_image_cli():
             # Try to find generated images
             if result.returncode == 0:
                 generated_images = []
-                # Look for recently created images in the generated_images directory
+                # Look for recently created images (within the last 5 minutes),
+                # newest first; DirEntry.stat() is cached from the scan.
                 if UPLOAD_FOLDER.exists():
-                    for img_file in UPLOAD_FOLDER.glob("*.png"):
-                        # Check if file was created recently (within last 5 minutes)
-                        if (
-                            datetime.now().timestamp() - img_file.stat().st_mtime
-                        ) < 300:
-                            try:
-                                with open(img_file, "rb") as f:
-                                    img_data = f.read()
-                                    img_b64 = base64.b64encode(img_data).decode("utf-8")
-                                    generated_images.append(
-                                        {
-                                            "filename": img_file.name,
-                                            "path": str(img_file),
-                                            "data": f"data:image/png;base64,{img_b64}",
-                                        }
-                                    )
-                            except Exception as e:
-                                print(f"Error reading image {img_file}: {e}")
+                    cutoff = time.time() - 300
+                    with os.scandir(UPLOAD_FOLDER) as entries:
+                        recent = [
+                            entry
+                            for entry in entries
+                            if entry.name.endswith(".png")
+                            and entry.stat().st_mtime >= cutoff
+                        ]
+                    recent.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+                    generated_images = [
+                        item
+                        for item in _ENCODE_POOL.map(
+                            _read_and_encode_png,
+                            (e.path for e in recent),
+                            (e.name for e in recent),
+                        )
+                        if item is not None
+                    ]
 
                 response_data["generated_images"] = generated_images
 
@@ -320,17 +439,19 @@ def list_images():
     try:
         images = []
         if UPLOAD_FOLDER.exists():
-            for img_file in UPLOAD_FOLDER.glob("*"):
-                if img_file.is_file() and img_file.suffix.lower() in [
-                    ".png",
-                    ".jpg",
-                    ".jpeg",
-                    ".webp",
-                ]:
-                    stat = img_file.stat()
+            # scandir caches is_file/stat from the directory read, so the
+            # listing costs one syscall per entry instead of three.
+            with os.scandir(UPLOAD_FOLDER) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    ext = entry.name.rsplit(".", 1)[-1].lower()
+                    if ext not in ("png", "jpg", "jpeg", "webp"):
+                        continue
+                    stat = entry.stat()
                     images.append(
                         {
-                            "filename": img_file.name,
+                            "filename": entry.name,
                             "size": stat.st_size,
                             "created": datetime.fromtimestamp(
                                 stat.st_ctime
@@ -338,7 +459,7 @@ def list_images():
                             "modified": datetime.fromtimestamp(
                                 stat.st_mtime
                             ).isoformat(),
-                            "url": f"/api/images/{img_file.name}",
+                            "url": f"/api/images/{entry.name}",
                         }
                     )
 
@@ -366,7 +487,7 @@ if __name__ == "__main__":
 
 
 def main(
-    host: str = "0.0.0.0", port: int = 5000, debug: bool = True, threaded: bool = True
+    host: str = "0.0.0.0", port: int = 5000, debug: bool = False, threaded: bool = True
 ):
     print("🎨 Starting Imagai Web Server...")
     print(f"📁 Generated images will be saved to: {UPLOAD_FOLDER.absolute()}")
@@ -374,4 +495,14 @@ def main(
     print(f"🌐 Web interface will be available at: http://localhost:{port}")
     print("\n" + "=" * 50)
 
-    app.run(host=host, port=port, debug=debug, threaded=threaded)
+    # Werkzeug's dev server (reloader, interactive debugger, pure-Python
+    # parsing) is kept behind IMAGAI_DEV; normal runs go through waitress.
+    if debug or os.environ.get("IMAGAI_DEV"):
+        app.run(host=host, port=port, debug=True, threaded=threaded)
+        return
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host=host, port=port, debug=False, threaded=threaded)
+        return
+    serve(app, host=host, port=port, threads=16)